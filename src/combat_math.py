@@ -1,14 +1,69 @@
-from typing import List, Coroutine, Any
+from typing import Dict, List, Optional, Tuple, Coroutine, Any
+from functools import lru_cache
+import asyncio
 import math
 from wizwalker import Client
 from wizwalker.combat import CombatMember
 from wizwalker.memory.memory_objects.spell_effect import DynamicSpellEffect, SpellEffects, SpellEffect
-from src.combat_objects import get_total_effects, id_to_member, school_list_ids, opposite_school_ids
+from src.combat_objects import get_total_effects, id_to_member, school_list_ids, school_id_list, opposite_school_ids
 from src.combat_utils import add_universal_stat
 from dataclasses import dataclass
 
 
-@dataclass
+# EffectAttributes by (client, spell effect address, round number). Effects stay at the same address while they're hanging, so the reads only need to happen once a round.
+# Addresses are only unique within one game client, so the client is part of the key.
+_effect_attr_cache: Dict[Tuple[Client, int, int], "EffectAttributes"] = {}
+
+# CombatStatsSnapshots by (snapshot type, member owner ID, round number). Stats only change between rounds, hanging effects are read separately.
+_stats_snapshot_cache: Dict[Tuple[type, int, int], "CombatStatsSnapshot"] = {}
+# Snapshot reads still in flight by the same key, so a snapshot requested twice at once is only read once
+_pending_stats_snapshots: Dict[Tuple[type, int, int], "asyncio.Task[CombatStatsSnapshot]"] = {}
+
+# DuelCurveParams by client. The duel's limits don't change during a battle.
+_curve_params_cache: Dict[Client, "DuelCurveParams"] = {}
+
+# The last round number seen from each client's duel. Anything cached for a round no client is on anymore gets dropped.
+_cache_rounds: Dict[Client, int] = {}
+
+
+def clear_effect_cache():
+    # Effects can be removed and their memory reused, so this can't outlive a round
+    _effect_attr_cache.clear()
+
+
+def clear_stats_cache():
+    _stats_snapshot_cache.clear()
+    _pending_stats_snapshots.clear()
+
+
+def clear_curve_params_cache():
+    _curve_params_cache.clear()
+
+
+def clear_round_caches():
+    # The caches follow the duel's round on their own (see _sync_cache_round), this only forces everything to be read again
+    clear_effect_cache()
+    clear_stats_cache()
+    clear_curve_params_cache()
+    _cache_rounds.clear()
+
+
+def _sync_cache_round(client: Client, round_num: int):
+    # Called with the duel's round number before reading anything for a calculation. When the client's round changed,
+    # its curve params are read again and whatever was cached for rounds no client is on anymore is dropped.
+    if _cache_rounds.get(client) == round_num:
+        return
+
+    _cache_rounds[client] = round_num
+    _curve_params_cache.pop(client, None)
+
+    current_rounds = set(_cache_rounds.values())
+    for cache in (_effect_attr_cache, _stats_snapshot_cache):
+        for key in [key for key in cache if key[-1] not in current_rounds]:
+            del cache[key]
+
+
+@dataclass(slots=True, frozen=True)
 class EffectAttributes:
     """A non-async cache of spell effect attributes used in dmg calculations"""
     effect_param: int
@@ -18,63 +73,224 @@ class EffectAttributes:
     enchantment_spell_template_id: int
 
     @classmethod
-    async def from_spell_effect(cls, effect: SpellEffect):
-        return cls(
-            await effect.effect_param(),
-            await effect.effect_type(),
-            await effect.damage_type(),
-            await effect.spell_template_id(),
-            await effect.enchantment_spell_template_id()
+    async def from_spell_effect(cls, client: Client, effect: SpellEffect, round_num: int):
+        key = (client, effect.base_address, round_num)
+        cached = _effect_attr_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # None of these reads depend on each other, so let them overlap
+        params = await asyncio.gather(
+            effect.effect_param(),
+            effect.effect_type(),
+            effect.damage_type(),
+            effect.spell_template_id(),
+            effect.enchantment_spell_template_id()
         )
+        res = cls(*params)
+        _effect_attr_cache[key] = res
+        return res
+
+
+async def effect_attributes(client: Client, effects: List[SpellEffect], round_num: int) -> List[EffectAttributes]:
+    # Gets the EffectAttributes of each effect, in order. Cached ones are resolved right away and only the rest are read, concurrently.
+    effect_atrs = [_effect_attr_cache.get((client, effect.base_address, round_num)) for effect in effects]
+    missing = [i for i, effect_atr in enumerate(effect_atrs) if effect_atr is None]
+    if missing:
+        read_atrs = await asyncio.gather(*[EffectAttributes.from_spell_effect(client, effects[i], round_num) for i in missing])
+        for i, effect_atr in zip(missing, read_atrs):
+            effect_atrs[i] = effect_atr
+
+    return effect_atrs
 
 
 async def real_stat(stat_func: Coroutine[Any, Any, List[float]], uni_func: Coroutine[Any, Any, float]) -> List[float]:
     # Handles adding two stat reading coroutines
-    base_stats = await stat_func()
-    uni_stat = await uni_func()
+    base_stats, uni_stat = await asyncio.gather(stat_func(), uni_func())
+
+    # Nothing to add, skip building a new list
+    if uni_stat == 0.0:
+        return base_stats
 
     return add_universal_stat(base_stats, uni_stat)
 
 
+@dataclass(slots=True, frozen=True)
+class CombatStatsSnapshot:
+    """A non-async cache of the stats of a member used in dmg calculations. Subclasses read only what one side of the calculation needs."""
+
+    @classmethod
+    async def from_member_id(cls, member_id: int, members: List[CombatMember], round_num: int):
+        key = (cls, member_id, round_num)
+        cached = _stats_snapshot_cache.get(key)
+        if cached is not None:
+            return cached
+
+        pending = _pending_stats_snapshots.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(cls._read(key, member_id, members))
+            _pending_stats_snapshots[key] = pending
+
+        # Shielded so a cancelled caller doesn't cancel the read for everyone else waiting on it
+        return await asyncio.shield(pending)
+
+    @classmethod
+    async def _read(cls, key: Tuple[type, int, int], member_id: int, members: List[CombatMember]):
+        try:
+            member = await id_to_member(member_id, members)
+            res = await cls._read_member(member)
+
+            # Only store the result if the caches weren't cleared while reading, otherwise it may belong to the previous round
+            if _pending_stats_snapshots.get(key) is asyncio.current_task():
+                _stats_snapshot_cache[key] = res
+            return res
+
+        finally:
+            if _pending_stats_snapshots.get(key) is asyncio.current_task():
+                del _pending_stats_snapshots[key]
+
+    @classmethod
+    async def _read_member(cls, member: CombatMember):
+        raise NotImplementedError
+
+
+@dataclass(slots=True, frozen=True)
+class CasterStatsSnapshot(CombatStatsSnapshot):
+    """The per-school stats of a member when it is the caster"""
+    damages: List[float]
+    flat_damages: List[float]
+    crits: List[float]
+    pierces: List[float]
+    level: int
+    is_player: bool
+
+    @classmethod
+    async def _read_member(cls, member: CombatMember):
+        stats, level, is_player = await asyncio.gather(member.get_stats(), member.level(), member.is_player())
+        school_stats = await asyncio.gather(
+            real_stat(stats.dmg_bonus_percent, stats.dmg_bonus_percent_all),
+            real_stat(stats.dmg_bonus_flat, stats.dmg_bonus_flat_all),
+            real_stat(stats.critical_hit_rating_by_school, stats.critical_hit_rating_all),
+            real_stat(stats.ap_bonus_percent, stats.ap_bonus_percent_all)
+        )
+        return cls(*school_stats, level, is_player)
+
+
+@dataclass(slots=True, frozen=True)
+class TargetStatsSnapshot(CombatStatsSnapshot):
+    """The per-school stats of a member when it is the target"""
+    resistances: List[float]
+    flat_resistances: List[float]
+    blocks: List[float]
+    is_player: bool
+
+    @classmethod
+    async def _read_member(cls, member: CombatMember):
+        stats, is_player = await asyncio.gather(member.get_stats(), member.is_player())
+        school_stats = await asyncio.gather(
+            real_stat(stats.dmg_reduce_percent, stats.dmg_reduce_percent_all),
+            real_stat(stats.dmg_reduce_flat, stats.dmg_reduce_flat_all),
+            real_stat(stats.block_rating_by_school, stats.block_rating_all)
+        )
+        return cls(*school_stats, is_player)
+
+
+@lru_cache(maxsize=32)
+def curve_constants(l: float, k0: float, n0: float) -> Tuple[float, float]:
+    # The curve constants only depend on the duel's limit values, which stay the same for the whole battle
+    limit = l * 100
+
+    # Calculate k, thank you charlied134 and Major
+    if k0 != 0:
+        k = math.log(limit / (limit - k0)) / k0
+    else:
+        k = 1 / limit
+
+    # Calculate n, thank you charlied134 and Major
+    n = math.log(1 - (k0 + n0) / limit) + k * (k0 + n0)
+
+    return k, n
+
+
 def curve_stat(stat: float, l: float, k0: float, n0: float) -> float:
     # Curves a stat in the same way the game does with resist and damage values past a certain intersection (starting point of the limit)
     if stat > (k0 + n0) / 100:
-        limit = l * 100
+        k, n = curve_constants(l, k0, n0)
+        stat = l - l * math.exp(-1 * k * (stat * 100) + n)
 
-        # Calculate k, thank you charlied134 and Major
-        if k0 != 0:
-            k = math.log(limit / (limit - k0)) / k0
-        else:
-            k = 1 / limit
+    return stat
 
-        # Calculate n, thank you charlied134 and Major
-        n = math.log(1 - (k0 + n0) / limit) + k * (k0 + n0)
 
-        stat = l - l * math.e ** (-1 * k * (stat * 100) + n)
+@dataclass(slots=True, frozen=True)
+class DuelCurveParams:
+    """A non-async cache of the duel values used to curve damage and resist"""
+    damage_limit: float
+    d_k0: float
+    d_n0: float
+    resist_limit: float
+    r_k0: float
+    r_n0: float
+
+
+async def get_curve_params(client: Client) -> DuelCurveParams:
+    cached = _curve_params_cache.get(client)
+    if cached is not None:
+        return cached
+
+    duel = client.duel
+    params = await asyncio.gather(
+        duel.damage_limit(),
+        duel.d_k0(),
+        duel.d_n0(),
+        duel.resist_limit(),
+        duel.r_k0(),
+        duel.r_n0()
+    )
+    res = DuelCurveParams(*params)
+    _curve_params_cache[client] = res
+    return res
+
+
+def curve_damage(is_player: bool, damage: float, curve_params: DuelCurveParams) -> float:
+    # Only players have their damage curved
+    if is_player:
+        return curve_stat(damage, curve_params.damage_limit, curve_params.d_k0, curve_params.d_n0)
 
-    return stat
+    return damage
 
 
-async def curve_damage(client: Client, member: CombatMember, damage: float) -> float:
-    if await member.is_player():
-        l = await client.duel.damage_limit()
-        k0 = await client.duel.d_k0()
-        n0 = await client.duel.d_n0()
+def curve_resist(is_player: bool, resist: float, curve_params: DuelCurveParams) -> float:
+    # Only players have their resist curved
+    if is_player:
+        return curve_stat(resist, curve_params.resist_limit, curve_params.r_k0, curve_params.r_n0)
 
-        return curve_stat(damage, l, k0, n0)
+    return resist
 
-    return damage
 
+enchantments_not_stackable_with_unenchanted = frozenset({
+    655113637,  # Indemity
+    85300353,  # Aegis
+    # TODO: Idemnity (Item Card)
+    # TODO: Aegis (Item Card)
+})
 
-async def curve_resist(client: Client, member: CombatMember, resist: float) -> float:
-    if await member.is_player():
-        l = await client.duel.resist_limit()
-        k0 = await client.duel.r_k0()
-        n0 = await client.duel.r_n0()
 
-        return curve_stat(resist, l, k0, n0)
+# Effect types that change the outcome of a hit, anything else is skipped before matching
+outgoing_damage_effect_types = frozenset({
+    SpellEffects.modify_outgoing_damage,
+    SpellEffects.modify_outgoing_damage_flat,
+    SpellEffects.modify_outgoing_armor_piercing,
+    SpellEffects.modify_outgoing_damage_type,
+})
 
-    return resist
+incoming_damage_effect_types = frozenset({
+    SpellEffects.modify_incoming_damage,
+    SpellEffects.intercept,
+    SpellEffects.modify_incoming_damage_flat,
+    SpellEffects.absorb_damage,
+    SpellEffects.modify_incoming_armor_piercing,
+    SpellEffects.modify_incoming_damage_type,
+})
 
 
 def spell_effect_stacking_id(spell_template_id: int, enchantment_spell_template_id: int) -> tuple:
@@ -83,157 +299,201 @@ def spell_effect_stacking_id(spell_template_id: int, enchantment_spell_template_
     If two stacking IDs match, the spell effects do not stack.
      - Aegis and Indemity don't stack with un-enchanted versions of the SpellEffect
     """
-    enchantments_not_stackable_with_unenchanted = {
-        655113637,  # Indemity
-        85300353,  # Aegis
-        # TODO: Idemnity (Item Card)
-        # TODO: Aegis (Item Card)
-    }
-
     if enchantment_spell_template_id in enchantments_not_stackable_with_unenchanted:
         enchantment_spell_template_id = 0  # For stacking purposes, these are the same as unenchanted.
     return (spell_template_id, enchantment_spell_template_id)
 
 
-async def base_damage_calculation_from_id(client: Client, members: List[CombatMember], caster_id: int, target_id: int, damage: float, damage_type: int, global_effect: DynamicSpellEffect = None, force_crit: bool = False) -> float:
-    # Calculates damage from given base damage value, and is the basis for both exact and damage potential calculation. Works based off of IDs.
+@dataclass(slots=True, frozen=True)
+class DamageCalculationInputs:
+    """Everything read from the game for a damage calculation between a caster and a target, independent of the school"""
+    caster_snapshot: CasterStatsSnapshot
+    target_snapshot: TargetStatsSnapshot
+    caster_effect_atrs: List[EffectAttributes]
+    target_effect_atrs: List[EffectAttributes]
+    curve_params: Optional[DuelCurveParams]  # Only read if the caster or target is a player
+
+    @classmethod
+    async def from_id(cls, client: Client, members: List[CombatMember], caster_id: int, target_id: int, global_effect: DynamicSpellEffect = None):
+        # Stats and effects are cached per round, so nothing read in an earlier round is reused
+        round_num = await client.duel.round_num()
+        _sync_cache_round(client, round_num)
+
+        # None of the stat and effect reads depend on each other, so they are all issued at once
+        caster_snapshot, target_snapshot, caster_effects, target_effects = await asyncio.gather(
+            CasterStatsSnapshot.from_member_id(caster_id, members, round_num),
+            TargetStatsSnapshot.from_member_id(target_id, members, round_num),
+            get_total_effects(caster_id, members),
+            get_total_effects(target_id, members)
+        )
+
+        # Charms use FIFO (queue behavior) in game, but the first applied blades show up at the bottom of this list.
+        # Traps/Shields use LIFO (stack behavior) in game, so the target effects keep their order.
+        caster_effects = [effect for effect in reversed(caster_effects) if effect]
+        target_effects = [effect for effect in target_effects if effect]
+
+        # Global effects
+        if global_effect:
+            caster_effects.append(global_effect)
+            target_effects.append(global_effect)
+
+        # Break up caster and target hanging effect objects, reading every effect of both sides at once
+        # Only players have their damage and resist curved, so the duel is left alone otherwise
+        if caster_snapshot.is_player or target_snapshot.is_player:
+            effect_atrs, curve_params = await asyncio.gather(effect_attributes(client, caster_effects + target_effects, round_num), get_curve_params(client))
+        else:
+            effect_atrs = await effect_attributes(client, caster_effects + target_effects, round_num)
+            curve_params = None
+
+        return cls(
+            caster_snapshot,
+            target_snapshot,
+            effect_atrs[:len(caster_effects)],
+            effect_atrs[len(caster_effects):],
+            curve_params
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class DamageKernel:
+    """A damage calculation for a fixed school and set of inputs, reduced to what it does to the base damage"""
+    operations: Tuple[Tuple[bool, float], ...]  # (is_multiplier, value), applied in order
+    flat_resist: float
+    resist_multiplier: float
+
+    def apply(self, damage: float) -> float:
+        for is_multiplier, value in self.operations:
+            if is_multiplier:
+                damage *= value
+            else:
+                damage += value
+
+        # Apply flat resist
+        damage -= self.flat_resist
+        damage = abs(damage)
+
+        return damage * self.resist_multiplier
 
-    # Get base objects from ID arguments
-    caster = await id_to_member(caster_id, members)
-    target = await id_to_member(target_id, members)
-
-    # Caster-specific objects
-    caster_stats = await caster.get_stats()
-    # Charms use FIFO (queue behavior) in game, but the first applied blades show up at the bottom of this list.
-    caster_effects: List[DynamicSpellEffect] = await get_total_effects(caster_id, members)
-    caster_effects.reverse()
-
-    # Target-specific objects
-    target_stats = await target.get_stats()
-    # Traps/Shields use LIFO (stack behavior) in game.
-    target_effects: List[DynamicSpellEffect] = await get_total_effects(target_id, members)
-
-    # Global effects
-    caster_effects.append(global_effect)
-    target_effects.append(global_effect)
-
-    # Caster Stats
-    caster_damages = await real_stat(caster_stats.dmg_bonus_percent, caster_stats.dmg_bonus_percent_all)
-    caster_flat_damages = await real_stat(caster_stats.dmg_bonus_flat, caster_stats.dmg_bonus_flat_all)
-    caster_crits = await real_stat(caster_stats.critical_hit_rating_by_school, caster_stats.critical_hit_rating_all)
-    caster_pierces = await real_stat(caster_stats.ap_bonus_percent, caster_stats.ap_bonus_percent_all)
-    caster_level = await caster.level()
-
-    # Target Stats
-    target_resistances = await real_stat(target_stats.dmg_reduce_percent, target_stats.dmg_reduce_percent_all)
-    target_flat_resistances = await real_stat(target_stats.dmg_reduce_flat, target_stats.dmg_reduce_flat_all)
-    target_blocks = await real_stat(target_stats.block_rating_by_school, target_stats.block_rating_all)
-
-    # Break up caster hanging effect objects
-    caster_effect_atrs: List[EffectAttributes] = []
-    for effect in caster_effects:
-        if effect:
-            caster_effect_atrs.append(await EffectAttributes.from_spell_effect(effect))
-
-    target_effect_atrs: List[EffectAttributes] = []
-    for effect in target_effects:
-        if effect:
-            target_effect_atrs.append(await EffectAttributes.from_spell_effect(effect))
+
+def damage_kernel(inputs: DamageCalculationInputs, damage_type: int, force_crit: bool = False) -> DamageKernel:
+    # Works out what a hit of the given school does to any base damage value, using already read inputs
+    universal_school_id = 80289  # Effects of this school apply regardless of the damage type
+    caster_snapshot = inputs.caster_snapshot
+    target_snapshot = inputs.target_snapshot
 
     initial_damage_type = damage_type
     initial_damage_type_index = school_list_ids[damage_type]
 
     # Relevant caster stats for the damage type
-    caster_damage = caster_damages[initial_damage_type_index]
-    caster_flat_damages = caster_flat_damages[initial_damage_type_index]
-    caster_crit = caster_crits[initial_damage_type_index]
-    caster_pierce = caster_pierces[initial_damage_type_index]
+    caster_damage = caster_snapshot.damages[initial_damage_type_index]
+    caster_flat_damages = caster_snapshot.flat_damages[initial_damage_type_index]
+    caster_crit = caster_snapshot.crits[initial_damage_type_index]
+    caster_pierce = caster_snapshot.pierces[initial_damage_type_index]
 
     # Curve damage stats
-    curved_caster_damage = await curve_damage(client, caster, caster_damage)
+    curved_caster_damage = curve_damage(caster_snapshot.is_player, caster_damage, inputs.curve_params)
     curved_caster_damage += 1
 
+    # Every step only scales or offsets the damage, so they are recorded in order as (is_multiplier, value)
+    operations = []
+
     # Applying curved damage and flat damage
-    damage *= curved_caster_damage
-    damage += caster_flat_damages
+    operations.append((True, curved_caster_damage))
+    operations.append((False, caster_flat_damages))
 
     # outgoing hanging effects (caster)
     seen_caster_effect_stacking_ids = set()
-    for effect_atr in caster_effect_atrs:
-        stacking_id = spell_effect_stacking_id(effect_atr.spell_template_id, effect_atr.enchantment_spell_template_id)
+    for effect_atr in inputs.caster_effect_atrs:
         # only consider effects that matches the school or are universal
-        if stacking_id not in seen_caster_effect_stacking_ids \
-                and (effect_atr.damage_type == damage_type or effect_atr.damage_type == 80289):
-            seen_caster_effect_stacking_ids.add(stacking_id)
-            match effect_atr.effect_type:
-                case SpellEffects.modify_outgoing_damage:
-                    damage *= (effect_atr.effect_param / 100) + 1
+        effect_damage_type = effect_atr.damage_type
+        if effect_damage_type != damage_type and effect_damage_type != universal_school_id:
+            continue
 
-                case SpellEffects.modify_outgoing_damage_flat:
-                    damage += effect_atr.effect_param
+        # inlined spell_effect_stacking_id
+        enchantment_id = effect_atr.enchantment_spell_template_id
+        stacking_id = (effect_atr.spell_template_id, 0 if enchantment_id in enchantments_not_stackable_with_unenchanted else enchantment_id)
+        if stacking_id in seen_caster_effect_stacking_ids:
+            continue
+        seen_caster_effect_stacking_ids.add(stacking_id)
 
-                case SpellEffects.modify_outgoing_armor_piercing:
-                    caster_pierce += effect_atr.effect_param
+        effect_type = effect_atr.effect_type
+        if effect_type not in outgoing_damage_effect_types:
+            continue
 
-                case SpellEffects.modify_outgoing_damage_type:
-                    damage_type = effect_atr.effect_param
+        match effect_type:
+            case SpellEffects.modify_outgoing_damage:
+                operations.append((True, (effect_atr.effect_param / 100) + 1))
 
-                case _:
-                    pass
+            case SpellEffects.modify_outgoing_damage_flat:
+                operations.append((False, effect_atr.effect_param))
+
+            case SpellEffects.modify_outgoing_armor_piercing:
+                caster_pierce += effect_atr.effect_param
+
+            case SpellEffects.modify_outgoing_damage_type:
+                damage_type = effect_atr.effect_param
 
     # incoming hanging effects (target)
     seen_target_effect_stacking_ids = set()
-    for effect_atr in target_effect_atrs:
-        stacking_id = spell_effect_stacking_id(effect_atr.spell_template_id, effect_atr.enchantment_spell_template_id)
-        if stacking_id not in seen_target_effect_stacking_ids \
-                and (effect_atr.damage_type == damage_type or effect_atr.damage_type == 80289):
-            seen_target_effect_stacking_ids.add(stacking_id)
-            match effect_atr.effect_type:
-                # traps/shields, and pierce handling
-                case SpellEffects.modify_incoming_damage:
-                    ward_param = effect_atr.effect_param
-                    if ward_param < 0:
-                        ward_param += caster_pierce
-                        caster_pierce += effect_atr.effect_param
-                        if ward_param > 0:
-                            ward_param = 0
-                        if caster_pierce < 0:
-                            caster_pierce = 0
-                    damage *= (ward_param / 100) + 1
-
-                case SpellEffects.intercept:
-                    damage *= (effect_atr.effect_param / 100) + 1
-
-                case SpellEffects.modify_incoming_damage_flat:
-                    damage += effect_atr.effect_param
-
-                case SpellEffects.absorb_damage:
-                    damage += effect_atr.effect_param
-
-                case SpellEffects.modify_incoming_armor_piercing:
+    for effect_atr in inputs.target_effect_atrs:
+        effect_damage_type = effect_atr.damage_type
+        if effect_damage_type != damage_type and effect_damage_type != universal_school_id:
+            continue
+
+        enchantment_id = effect_atr.enchantment_spell_template_id
+        stacking_id = (effect_atr.spell_template_id, 0 if enchantment_id in enchantments_not_stackable_with_unenchanted else enchantment_id)
+        if stacking_id in seen_target_effect_stacking_ids:
+            continue
+        seen_target_effect_stacking_ids.add(stacking_id)
+
+        effect_type = effect_atr.effect_type
+        if effect_type not in incoming_damage_effect_types:
+            continue
+
+        match effect_type:
+            # traps/shields, and pierce handling
+            case SpellEffects.modify_incoming_damage:
+                ward_param = effect_atr.effect_param
+                if ward_param < 0:
+                    ward_param += caster_pierce
                     caster_pierce += effect_atr.effect_param
+                    if ward_param > 0:
+                        ward_param = 0
+                    if caster_pierce < 0:
+                        caster_pierce = 0
+                operations.append((True, (ward_param / 100) + 1))
+
+            case SpellEffects.intercept:
+                operations.append((True, (effect_atr.effect_param / 100) + 1))
 
-                # prism handling (final damage type is the effect param)
-                case SpellEffects.modify_incoming_damage_type:
-                    damage_type = effect_atr.effect_param
+            case SpellEffects.modify_incoming_damage_flat:
+                operations.append((False, effect_atr.effect_param))
 
-                case _:
-                    pass
+            case SpellEffects.absorb_damage:
+                operations.append((False, effect_atr.effect_param))
+
+            case SpellEffects.modify_incoming_armor_piercing:
+                caster_pierce += effect_atr.effect_param
+
+            # prism handling (final damage type is the effect param)
+            case SpellEffects.modify_incoming_damage_type:
+                damage_type = effect_atr.effect_param
 
     final_damage_type = damage_type
     final_damage_type_index = school_list_ids[final_damage_type]
 
     # Relevant target stats for the final damage type
-    target_resist = target_resistances[final_damage_type_index]
-    target_flat_resist = target_flat_resistances[final_damage_type_index]
-    target_block = target_blocks[final_damage_type_index]
+    target_resist = target_snapshot.resistances[final_damage_type_index]
+    target_flat_resist = target_snapshot.flat_resistances[final_damage_type_index]
+    target_block = target_snapshot.blocks[final_damage_type_index]
 
     # Curve the resist stat.
-    curved_target_resist = await curve_resist(client, target, target_resist)
+    curved_target_resist = curve_resist(target_snapshot.is_player, target_resist, inputs.curve_params)
 
     # calculates critical multiplier and chance
     # This assumes that caster crit uses the initial damage school, but target block applies to the final damage school.
     if caster_crit > 0:
+        caster_level = caster_snapshot.level
         if caster_level > 100:
             caster_level = 100
 
@@ -245,11 +505,7 @@ async def base_damage_calculation_from_id(client: Client, members: List[CombatMe
         # applying the crit multiplier if the chance is above a certain threshold
         # TODO: Express both the crit & non-crit values, along with the crit percentage.
         if (crit_chance >= 0.85 and force_crit is None) or force_crit:
-            damage *= crit_damage_multiplier
-
-    # Apply flat resist
-    damage -= target_flat_resist
-    damage = abs(damage)
+            operations.append((True, crit_damage_multiplier))
 
     # apply resist, accounting for pierce and potential boost
     if curved_target_resist > 0:
@@ -261,6 +517,23 @@ async def base_damage_calculation_from_id(client: Client, members: List[CombatMe
     else:
         curved_target_resist = abs(curved_target_resist) + 1
 
-    damage *= curved_target_resist
+    return DamageKernel(tuple(operations), target_flat_resist, curved_target_resist)
 
-    return damage
+
+def damage_calculation(inputs: DamageCalculationInputs, damage: float, damage_type: int, force_crit: bool = False) -> float:
+    # Calculates damage from given base damage value using already read inputs. Doesn't touch the game, so it can be repeated cheaply for any school.
+    return damage_kernel(inputs, damage_type, force_crit).apply(damage)
+
+
+async def base_damage_calculation_from_id(client: Client, members: List[CombatMember], caster_id: int, target_id: int, damage: float, damage_type: int, global_effect: DynamicSpellEffect = None, force_crit: bool = False) -> float:
+    # Calculates damage from given base damage value, and is the basis for both exact and damage potential calculation. Works based off of IDs.
+    # Reads are cached for the duel's current round.
+    inputs = await DamageCalculationInputs.from_id(client, members, caster_id, target_id, global_effect)
+    return damage_calculation(inputs, damage, damage_type, force_crit)
+
+
+async def base_damage_potential_from_id(client: Client, members: List[CombatMember], caster_id: int, target_id: int, damage: float, global_effect: DynamicSpellEffect = None, force_crit: bool = False, school_ids: List[int] = school_id_list) -> Dict[int, float]:
+    # Calculates damage from given base damage value for every school, keyed by school ID. The game is only read once for all of them.
+    # Reads are cached for the duel's current round.
+    inputs = await DamageCalculationInputs.from_id(client, members, caster_id, target_id, global_effect)
+    return {school_id: damage_calculation(inputs, damage, school_id, force_crit) for school_id in school_ids}
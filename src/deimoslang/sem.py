@@ -11,13 +11,21 @@ class SemError(Exception):
     pass
 
 
+# shared by every negated until condition, tokens are never modified after parsing
+_NOT_TOKEN = Token(TokenKind.keyword_not, "not", LineInfo(-1, -1, -1))
+
+# marks the end of a statement list while walking it, so a malformed list containing None still errors
+_END = object()
+
+
 class Scope:
     def __init__(self, parent: Optional["Scope"], is_block: bool):
         self.parent = parent
-        self._syms: list[Symbol] = []
+        self._syms: list[Symbol] = [] # ordered for lookups, the newest symbol shadows older ones
+        self._sym_set: set[Symbol] = set() # mirrors _syms for membership tests
         self._mixins: set[str] = set()
         self._unique_player_selectors: set[PlayerSelector] = set()
-        self._active_vars: list[Symbol] = []
+        self._active_vars: dict[Symbol, None] = {} # insertion ordered, cleanup happens in reverse
         self._cleaned_vars: set[Symbol] = set() # if all branching scopes agree on cleanup, do not clean up the same variables again
         self.is_block = is_block # cleanup must not cross a block boundary as we do not have the notion of a moved variable
 
@@ -28,19 +36,20 @@ class Scope:
         res = Scope(parent=self, is_block=False)
 
         # when a branch cleans up, the variables may still be active in the parent or other branches
-        res._active_vars = self._active_vars[:]
+        res._active_vars = self._active_vars.copy()
 
         return res
 
     # Only blocks require lookup for now. Variables are only used internally and the sym is always locally known
     def lookup_block_by_name(self, literal: str) -> Symbol | None:
-        for sym in reversed(self._syms):
-            if sym.kind != SymbolKind.block:
-                continue
-            if sym.literal == literal:
-                return sym
-        if self.parent is not None:
-            return self.parent.lookup_block_by_name(literal)
+        cur = self
+        while cur is not None:
+            for sym in reversed(cur._syms):
+                if sym.kind is not SymbolKind.block:
+                    continue
+                if sym.literal == literal:
+                    return sym
+            cur = cur.parent
         return None
 
     def is_mixin(self, literal: str) -> bool:
@@ -52,23 +61,24 @@ class Scope:
 
     def is_block_local_var(self, sym: Symbol) -> bool:
         cur = self
-        while sym is not None:
-            if sym in cur._syms:
+        while cur is not None:
+            if sym in cur._sym_set:
                 return True
             elif cur.is_block:
-                # must be checked after cur._syms
+                # must be checked after cur._sym_set
                 break
             cur = cur.parent
         return False
 
     def put_sym(self, sym: Symbol) -> Symbol:
         self._syms.append(sym)
+        self._sym_set.add(sym)
         return sym
 
     def activate_var(self, sym: Symbol):
         if sym in self._active_vars:
             raise SemError(f"Attempted to activate an already active variable: {sym}")
-        self._active_vars.append(sym)
+        self._active_vars[sym] = None
 
     def kill_var(self, sym: Symbol):
         if not self.is_block_local_var(sym):
@@ -76,7 +86,7 @@ class Scope:
         if sym not in self._active_vars:
             raise SemError(f"Attempted to kill an inactive variable: {sym}")
         self._cleaned_vars.add(sym)
-        self._active_vars.remove(sym)
+        del self._active_vars[sym]
 
 
 class Analyzer:
@@ -86,11 +96,30 @@ class Analyzer:
         self._block_defs: list[BlockDefStmt] = []
         self._stmts = stmts
         self._mixin_cache: dict[int, Symbol] = {} # {(block_sym, [mixed_syms]): mixed_block}
+        self._semmed_exprs: dict[int, tuple[Expression, Expression]] = {} # {id(expr): (expr, semmed)}, expr is kept so its id can't be reused
 
         self._block_nesting_level = 0
         self._loop_nesting_level = 0
         self._loop_nesting_stack = []
 
+        # statement type -> sem handler, looked up by exact type as there are no statement subclasses
+        self._stmt_handlers = {
+            TimerStmt: self._sem_timer,
+            ConstantDeclStmt: self._sem_constant_decl,
+            BlockDefStmt: self._sem_block_def,
+            StmtList: self._sem_stmt_list,
+            CallStmt: self._sem_call,
+            CommandStmt: self._sem_command,
+            IfStmt: self._sem_if,
+            LoopStmt: self._sem_loop,
+            WhileStmt: self._sem_while,
+            UntilStmt: self._sem_until,
+            TimesStmt: self._sem_times,
+            ReturnStmt: self._sem_return,
+            BreakStmt: self._sem_break,
+            MixinStmt: self._sem_mixin,
+        }
+
     def open_block(self):
         self.scope = self.scope.new_block()
 
@@ -137,13 +166,19 @@ class Analyzer:
 
     def gen_cleanup_all_vars(self) -> StmtList:
         res = []
-        for var in reversed(self.scope._active_vars):
+        # copied, as killing a variable removes it from the active ones
+        for var in reversed(list(self.scope._active_vars)):
             self.mark_var_dead(var)
             res.append(KillVarStmt(var))
         return StmtList(res)
 
     def sem_expr(self, expr: Expression) -> Expression:
-        return expr # TODO
+        # Expressions can be shared between statements (see UntilStmt), so each node is only analyzed once
+        if (semmed := self._semmed_exprs.get(id(expr))) is not None:
+            return semmed[1]
+        res = expr # TODO
+        self._semmed_exprs[id(expr)] = (expr, res)
+        return res
 
     def mix_block(self, stmt: BlockDefStmt, source_sym: Symbol) -> BlockDefStmt:
         def _mix_stmt(stmt: Stmt, mixins: set[str]):
@@ -206,154 +241,186 @@ class Analyzer:
         # Not found
         return None
 
-    def sem_stmt(self, stmt: Stmt) -> Stmt:
-        match stmt:
-            case TimerStmt():
-                return stmt
-            case ConstantDeclStmt():
-                stmt.value = self.sem_expr(stmt.value)
-                return stmt
-            case BlockDefStmt():
-                if not isinstance(stmt.name, IdentExpression):
-                    raise SemError(f"Only IdentExpression is allowed during block declaration")
-                sym = self.gen_block_sym(stmt.name.ident)
-                stmt.body.stmts.append(ReturnStmt())
-                self.open_block()
-                stmt.body = self.sem_stmt(stmt.body)
-                stmt.mixins = self.scope._mixins
-                self.close_block()
-                stmt.name = SymExpression(sym)
-                sym.defnode = stmt
-                if len(stmt.mixins) == 0:
-                    self._block_defs.append(stmt)
-                return None
-            case StmtList():
-                res = []
-                for inner in stmt.stmts:
-                    if semmed := self.sem_stmt(inner):
-                        res.append(semmed)
-                return StmtList(res)
-            case CallStmt():
-                if isinstance(stmt.name, IdentExpression):
-                    sym = self.scope.lookup_block_by_name(stmt.name.ident)
-                elif isinstance(stmt.name, SymExpression):
-                    sym = stmt.name.sym
-                else:
-                    raise SemError(f"Malformed call: {stmt}")
-                if self.scope.is_mixin(stmt.name.ident):
-                    return stmt # defer mixins until the last possible moment
-                else:
-                    if sym is None:
-                        raise SemError(f"Unable to find symbol in scope: {stmt.name.ident}")
-                    if sym.defnode is not None:
-                        assert isinstance(sym.defnode, BlockDefStmt)
-                        if len(sym.defnode.mixins) > 0:
-                            mixed_syms: dict[str, Symbol] = {}
-                            for m in sym.defnode.mixins:
-                                ms = self.scope.lookup_block_by_name(m)
-                                if ms is None:
-                                    raise SemError(f"Unable to resolve mixin: {m}")
-                                mixed_syms[m] = ms
-
-                            key = hash((sym, frozenset(mixed_syms.values())))
-                            if key in self._mixin_cache:
-                                sym = self._mixin_cache[key]
-                            else:
-                                mixed_sym = self.gen_block_sym(f":mixed_{stmt.name.ident}")
-                                mixed_sym.defnode = deepcopy(sym.defnode)
-                                mixed_sym.defnode.name = SymExpression(mixed_sym)
-                                self.mix_block(mixed_sym.defnode, sym)
-                                sym = mixed_sym
-                                self._block_defs.append(sym.defnode)
-                    stmt.name = SymExpression(sym)
-                    return stmt
-            case CommandStmt():
-                if isinstance(stmt.command, ParallelCommandStmt):
-                    for cmd in stmt.command.commands:
-                        self.scope._unique_player_selectors.add(cmd.player_selector)
-                    return stmt
-                else:
-                    # Original code for single commands
-                    self.scope._unique_player_selectors.add(stmt.command.player_selector)
-                    return stmt
-            case IfStmt():
-                stmt.expr = self.sem_expr(stmt.expr)
-
-                self.scope = self.scope.new_branch()
-                stmt.branch_true = self.sem_stmt(stmt.branch_true)
-                self.scope = self.scope.parent
-
-                self.scope = self.scope.new_branch()
-                stmt.branch_false = self.sem_stmt(stmt.branch_false)
-                self.scope = self.scope.parent
-                return stmt
-            case LoopStmt():
-                self.open_loop()
-                stmt.body = self.sem_stmt(stmt.body)
-                self.close_loop()
-                return stmt
-            case WhileStmt():
-                stmt.expr = self.sem_expr(stmt.expr)
-                self.open_loop()
-                stmt.body = self.sem_stmt(stmt.body)
-                self.close_loop()
-                return stmt
-            case UntilStmt():
-                self.open_loop()
-                expr = self.sem_expr(stmt.expr) # sem ahead of time because it's used twice
-                body = self.sem_stmt(stmt.body)
-                self.close_loop()
-                return IfStmt(
-                    expr,
-                    branch_true=StmtList([]),
-                    branch_false=StmtList([
-                        UntilRegion(
-                            expr=expr,
-                            body=WhileStmt(
-                                UnaryExpression(Token(TokenKind.keyword_not, "not", LineInfo(-1, -1, -1)), expr),
-                                body
-                            ),
-                        ),
-                    ])
-                )
-            case TimesStmt():
-                var_sym = self.def_var()
-                prologue = [
-                    DefVarStmt(var_sym),
-                    WriteVarStmt(var_sym, NumberExpression(stmt.num)),
-                ]
-                epilogue = [
-                    KillVarStmt(var_sym),
-                ]
-                cond = GreaterExpression(ReadVarExpr(SymExpression(var_sym)), NumberExpression(0))
-                stmt.body.stmts.append(
-                    WriteVarStmt(var_sym, SubExpression(ReadVarExpr(SymExpression(var_sym)), NumberExpression(1)))
-                )
-
-                res = StmtList(prologue + [self.sem_stmt(WhileStmt(cond, stmt.body))] + epilogue)
-                self.mark_var_dead(var_sym)
-                return res
-            case ReturnStmt():
-                if self._block_nesting_level <= 0:
-                    raise SemError(f"Return used outside of block scope")
-                return StmtList([
-                    self.gen_cleanup_all_vars(),
-                    stmt
-                ])
-            case BreakStmt():
-                if self._loop_nesting_level <= 0:
-                    raise SemError(f"Break used outside of loop scope")
-                return stmt
-            case DefVarStmt() | WriteVarStmt() | KillVarStmt():
+    def _sem_timer(self, stmt: TimerStmt) -> Stmt:
+        return stmt
+
+    def _sem_constant_decl(self, stmt: ConstantDeclStmt) -> Stmt:
+        stmt.value = self.sem_expr(stmt.value)
+        return stmt
+
+    def _sem_block_def(self, stmt: BlockDefStmt) -> Stmt | None:
+        if not isinstance(stmt.name, IdentExpression):
+            raise SemError(f"Only IdentExpression is allowed during block declaration")
+        sym = self.gen_block_sym(stmt.name.ident)
+        stmt.body.stmts.append(ReturnStmt())
+        self.open_block()
+        stmt.body = self.sem_stmt(stmt.body)
+        stmt.mixins = self.scope._mixins
+        self.close_block()
+        stmt.name = SymExpression(sym)
+        sym.defnode = stmt
+        if len(stmt.mixins) == 0:
+            self._block_defs.append(stmt)
+        return None
+
+    def _sem_stmt_list(self, stmt: StmtList) -> Stmt:
+        # nested lists are walked with an explicit stack, only other statements recurse
+        handlers = self._stmt_handlers
+        res = []
+        pending = [(iter(stmt.stmts), res)]
+        while pending:
+            inner_iter, inner_res = pending[-1]
+            inner = next(inner_iter, _END)
+            if inner is _END:
+                pending.pop()
+                continue
+
+            # the type is only looked up once per statement, sem_stmt is skipped when a handler exists
+            inner_type = type(inner)
+            if inner_type is StmtList:
+                nested_res = []
+                inner_res.append(StmtList(nested_res))
+                pending.append((iter(inner.stmts), nested_res))
+                continue
+            handler = handlers.get(inner_type)
+            semmed = handler(inner) if handler is not None else self.sem_stmt(inner)
+            if semmed:
+                inner_res.append(semmed)
+        return StmtList(res)
+
+    def _sem_call(self, stmt: CallStmt) -> Stmt:
+        if isinstance(stmt.name, IdentExpression):
+            sym = self.scope.lookup_block_by_name(stmt.name.ident)
+        elif isinstance(stmt.name, SymExpression):
+            sym = stmt.name.sym
+        else:
+            raise SemError(f"Malformed call: {stmt}")
+        if self.scope.is_mixin(stmt.name.ident):
+            return stmt # defer mixins until the last possible moment
+        else:
+            if sym is None:
+                raise SemError(f"Unable to find symbol in scope: {stmt.name.ident}")
+            if sym.defnode is not None:
+                assert isinstance(sym.defnode, BlockDefStmt)
+                if len(sym.defnode.mixins) > 0:
+                    mixed_syms: dict[str, Symbol] = {}
+                    for m in sym.defnode.mixins:
+                        ms = self.scope.lookup_block_by_name(m)
+                        if ms is None:
+                            raise SemError(f"Unable to resolve mixin: {m}")
+                        mixed_syms[m] = ms
+
+                    key = hash((sym, frozenset(mixed_syms.values())))
+                    if key in self._mixin_cache:
+                        sym = self._mixin_cache[key]
+                    else:
+                        mixed_sym = self.gen_block_sym(f":mixed_{stmt.name.ident}")
+                        mixed_sym.defnode = deepcopy(sym.defnode)
+                        mixed_sym.defnode.name = SymExpression(mixed_sym)
+                        self.mix_block(mixed_sym.defnode, sym)
+                        sym = mixed_sym
+                        self._block_defs.append(sym.defnode)
+            stmt.name = SymExpression(sym)
+            return stmt
+
+    def _sem_command(self, stmt: CommandStmt) -> Stmt:
+        if isinstance(stmt.command, ParallelCommandStmt):
+            for cmd in stmt.command.commands:
+                self.scope._unique_player_selectors.add(cmd.player_selector)
+            return stmt
+        else:
+            # Original code for single commands
+            self.scope._unique_player_selectors.add(stmt.command.player_selector)
+            return stmt
+
+    def _sem_if(self, stmt: IfStmt) -> Stmt:
+        stmt.expr = self.sem_expr(stmt.expr)
+
+        self.scope = self.scope.new_branch()
+        stmt.branch_true = self.sem_stmt(stmt.branch_true)
+        self.scope = self.scope.parent
+
+        self.scope = self.scope.new_branch()
+        stmt.branch_false = self.sem_stmt(stmt.branch_false)
+        self.scope = self.scope.parent
+        return stmt
+
+    def _sem_loop(self, stmt: LoopStmt) -> Stmt:
+        self.open_loop()
+        stmt.body = self.sem_stmt(stmt.body)
+        self.close_loop()
+        return stmt
+
+    def _sem_while(self, stmt: WhileStmt) -> Stmt:
+        stmt.expr = self.sem_expr(stmt.expr)
+        self.open_loop()
+        stmt.body = self.sem_stmt(stmt.body)
+        self.close_loop()
+        return stmt
+
+    def _sem_until(self, stmt: UntilStmt) -> Stmt:
+        self.open_loop()
+        expr = self.sem_expr(stmt.expr) # sem ahead of time because it's used twice
+        body = self.sem_stmt(stmt.body)
+        self.close_loop()
+        return IfStmt(
+            expr,
+            branch_true=StmtList([]),
+            branch_false=StmtList([
+                UntilRegion(
+                    expr=expr,
+                    body=WhileStmt(
+                        UnaryExpression(_NOT_TOKEN, expr),
+                        body
+                    ),
+                ),
+            ])
+        )
+
+    def _sem_times(self, stmt: TimesStmt) -> Stmt:
+        var_sym = self.def_var()
+        prologue = [
+            DefVarStmt(var_sym),
+            WriteVarStmt(var_sym, NumberExpression(stmt.num)),
+        ]
+        epilogue = [
+            KillVarStmt(var_sym),
+        ]
+        cond = GreaterExpression(ReadVarExpr(SymExpression(var_sym)), NumberExpression(0))
+        stmt.body.stmts.append(
+            WriteVarStmt(var_sym, SubExpression(ReadVarExpr(SymExpression(var_sym)), NumberExpression(1)))
+        )
+
+        res = StmtList(prologue + [self.sem_stmt(WhileStmt(cond, stmt.body))] + epilogue)
+        self.mark_var_dead(var_sym)
+        return res
+
+    def _sem_return(self, stmt: ReturnStmt) -> Stmt:
+        if self._block_nesting_level <= 0:
+            raise SemError(f"Return used outside of block scope")
+        return StmtList([
+            self.gen_cleanup_all_vars(),
+            stmt
+        ])
+
+    def _sem_break(self, stmt: BreakStmt) -> Stmt:
+        if self._loop_nesting_level <= 0:
+            raise SemError(f"Break used outside of loop scope")
+        return stmt
+
+    def _sem_mixin(self, stmt: MixinStmt) -> Stmt | None:
+        if not self.scope.is_block:
+            raise SemError("Mixin is only allowed inside blocks")
+        self.scope._mixins.add(stmt.name)
+        return None
+
+    def sem_stmt(self, stmt: Stmt) -> Stmt | None:
+        handler = self._stmt_handlers.get(type(stmt))
+        if handler is None:
+            if isinstance(stmt, (DefVarStmt, WriteVarStmt, KillVarStmt)):
                 return stmt
-            case MixinStmt():
-                if not self.scope.is_block:
-                    raise SemError("Mixin is only allowed inside blocks")
-                self.scope._mixins.add(stmt.name)
-                return None
-            case _:
-                raise SemError(f"Unhandled statement type: {stmt}")
-        raise SemError(f"Statement fell through: {stmt}")
+            raise SemError(f"Unhandled statement type: {stmt}")
+        return handler(stmt)
 
     def analyze_program(self):
         res = []